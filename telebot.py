@@ -7,11 +7,42 @@ import asyncio
 import logging
 import time
 import argparse
+import fnmatch
+import functools
+import hashlib
+import importlib.util
+import itertools
 import json
-from typing import List, Optional, Union, Dict, Any
-from dataclasses import dataclass, field, asdict
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Iterable, List, Optional, Union, Dict, Any
+from dataclasses import dataclass, field, fields, asdict
 from pathlib import Path
 
+# Prefer orjson for config (de)serialization when available; both branches
+# take and return bytes so callers don't care which one is active
+try:
+    import orjson
+
+    def _json_loads(data: bytes) -> Any:
+        return orjson.loads(data)
+
+    def _json_dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    def _json_loads(data: bytes) -> Any:
+        return json.loads(data)
+
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, indent=2).encode()
+
+# Maps argparse destinations to BotConfig field names where they differ,
+# and lists the arguments that are not config fields at all
+_ARG_RENAME = {'files': 'files_path', 'max_files': 'max_files_per_group'}
+_ARG_SKIP = frozenset({'legacy_args', 'config', 'save_config', 'verbose'})
+
+
 @dataclass
 class BotConfig:
     """Configuration for the Telegram bot"""
@@ -22,9 +53,13 @@ class BotConfig:
     message: str
     topic_id: Optional[int] = None
     files_path: Optional[str] = None
+    session_name: str = 'bot_session'
     max_files_per_group: int = 10
+    max_concurrent_uploads: int = 4
     retry_attempts: int = 3
-    retry_delay: int = 5
+    retry_base_delay: float = 1.0
+    retry_max_delay: float = 30.0
+    retry_jitter: float = 0.5
     config_file: Optional[str] = None
     dry_run: bool = False
     
@@ -32,31 +67,41 @@ class BotConfig:
     def from_dict(cls, data: Dict[str, Any]) -> 'BotConfig':
         """Create a BotConfig instance from a dictionary"""
         # Filter out any keys not in the dataclass
-        valid_fields = {f.name for f in fields(cls)}
-        filtered_data = {k: v for k, v in data.items() if k in valid_fields}
-        return cls(**filtered_data)
-    
+        return cls(**{k: v for k, v in data.items() if k in cls._VALID_FIELDS})
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for saving to config file"""
         return asdict(self)
 
 
+# Computed once at import time so from_dict doesn't re-introspect the
+# dataclass on every call
+BotConfig._VALID_FIELDS = frozenset(f.name for f in fields(BotConfig))
+
+
 class ColoredFormatter(logging.Formatter):
     """Custom formatter for colorful console output"""
-    
+
     COLORS = {
-        'DEBUG': '\033[94m',  # Blue
-        'INFO': '\033[92m',   # Green
-        'WARNING': '\033[93m',  # Yellow
-        'ERROR': '\033[91m',   # Red
-        'CRITICAL': '\033[91m\033[1m',  # Bold Red
-        'RESET': '\033[0m'
+        logging.DEBUG: '\033[94m',  # Blue
+        logging.INFO: '\033[92m',   # Green
+        logging.WARNING: '\033[93m',  # Yellow
+        logging.ERROR: '\033[91m',   # Red
+        logging.CRITICAL: '\033[91m\033[1m',  # Bold Red
     }
-    
+    RESET = '\033[0m'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Precompute (prefix, suffix) per level so format() is a single
+        # dict.get plus one concatenation
+        self._wrap = {level: (color, self.RESET) for level, color in self.COLORS.items()}
+
     def format(self, record):
         log_message = super().format(record)
-        if record.levelname in self.COLORS:
-            return f"{self.COLORS[record.levelname]}{log_message}{self.COLORS['RESET']}"
+        wrap = self._wrap.get(record.levelno)
+        if wrap:
+            return f"{wrap[0]}{log_message}{wrap[1]}"
         return log_message
 
 
@@ -83,30 +128,43 @@ class DependencyManager:
     @classmethod
     def check_and_install_dependencies(cls) -> None:
         """Check for and install required dependencies"""
-        installed = []
+        newly_installed = []
         failed = []
 
         for package in cls.REQUIRED_PACKAGES:
-            try:
-                __import__(package)
-                installed.append(package)
-                logging.debug(f"{package} is already installed")
-            except ImportError:
+            # find_spec only reads import metadata, so the check doesn't pay
+            # for actually importing the package
+            if importlib.util.find_spec(package) is None:
                 if cls.install_package(package):
-                    installed.append(package)
+                    newly_installed.append(package)
                 else:
                     failed.append(package)
+            else:
+                logging.debug(f"{package} is already installed")
 
         if failed:
             logging.error(f"Failed to install required packages: {', '.join(failed)}")
             sys.exit(1)
-        elif set(installed) != set(cls.REQUIRED_PACKAGES):
-            logging.info("All dependencies installed. Restarting script...")
-            os.execv(sys.executable, ['python3'] + sys.argv)
+        elif newly_installed:
+            # A fresh install is usable in-process once the import caches
+            # are flushed; only re-exec if the import still fails
+            importlib.invalidate_caches()
+            try:
+                for package in newly_installed:
+                    __import__(package)
+            except ImportError:
+                logging.info("All dependencies installed. Restarting script...")
+                os.execv(sys.executable, ['python3'] + sys.argv)
+            else:
+                logging.info(f"Installed missing packages: {', '.join(newly_installed)}")
         else:
             logging.info("All dependencies are properly installed!")
 
 
+# Files at or above this size get their own upload group
+_LARGE_FILE_THRESHOLD = 5 * 1024 * 1024
+
+
 class TelegramBot:
     """Telegram bot handler for sending messages and files"""
     
@@ -116,16 +174,44 @@ class TelegramBot:
         
         # Import here after dependency check
         from telethon import TelegramClient
+        from telethon.errors import (
+            AuthKeyError,
+            ChatIdInvalidError,
+            FloodWaitError,
+            MessageTooLongError,
+            NetworkMigrateError,
+            PeerIdInvalidError,
+            ServerError,
+            TimedOutError,
+        )
         from colorama import init
         init(autoreset=True)
-        
-        self.client = TelegramClient('bot_session', config.api_id, config.api_hash)
-        
+
+        self.client = TelegramClient(config.session_name, config.api_id, config.api_hash)
+        self._flood_wait_error = FloodWaitError
+        # Transient failures worth retrying vs. misconfigurations that
+        # will fail identically on every attempt
+        self._recoverable_errors = (FloodWaitError, ServerError, TimedOutError,
+                                    NetworkMigrateError, asyncio.TimeoutError, ConnectionError)
+        self._unrecoverable_errors = (AuthKeyError, ChatIdInvalidError,
+                                      PeerIdInvalidError, MessageTooLongError)
+
+    async def _sleep_backoff(self, attempt: int) -> None:
+        """Sleep before the next retry using exponential backoff with jitter"""
+        delay = min(self.config.retry_max_delay,
+                    self.config.retry_base_delay * (2 ** (attempt - 1)))
+        delay *= 1 + random.uniform(-self.config.retry_jitter, self.config.retry_jitter)
+        await asyncio.sleep(max(0.0, delay))
+
     async def start(self) -> None:
         """Start the bot client"""
         await self.client.start(bot_token=self.config.bot_token)
-        me = await self.client.get_me()
-        logging.info(f"Bot is active! Logged in as @{me.username}")
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            # get_me is an extra round-trip; only pay for it when verbose
+            me = await self.client.get_me()
+            logging.debug(f"Bot is active! Logged in as @{me.username}")
+        else:
+            logging.info("Bot is active!")
 
     async def stop(self) -> None:
         """Stop the bot client"""
@@ -153,90 +239,200 @@ class TelegramBot:
                 await self.client.send_message(**kwargs)
                 logging.info(f"Message sent successfully to chat ID: {self.config.chat_id}")
                 return
-            except Exception as e:
+            except self._unrecoverable_errors as e:
+                logging.error(f"Unrecoverable error sending message: {str(e)}")
+                raise
+            except self._recoverable_errors as e:
                 if attempt < attempts:
-                    logging.warning(f"Attempt {attempt} failed: {str(e)}. Retrying in {self.config.retry_delay} seconds...")
-                    await asyncio.sleep(self.config.retry_delay)
+                    logging.warning(f"Attempt {attempt} failed: {str(e)}. Retrying...")
+                    if isinstance(e, self._flood_wait_error):
+                        # Telegram tells us exactly how long to wait
+                        await asyncio.sleep(e.seconds + random.random())
+                    else:
+                        await self._sleep_backoff(attempt)
                 else:
                     logging.error(f"Failed to send message after {attempts} attempts: {str(e)}")
                     raise
+            except Exception as e:
+                logging.error(f"Unexpected error sending message: {str(e)}")
+                raise
+
+    async def send_files(self, files: Iterable[Union[str, Path]], message: str, retry: bool = True) -> None:
+        """Send files with a message to the specified chat
+
+        Accepts any iterable of paths (str or Path); groups are chunked
+        off the iterator as it yields, so the first upload is not blocked
+        on enumerating the full match set.
+        """
+        # Normalize to strings once; everything downstream works on str
+        file_iter = map(os.fspath, files)
 
-    async def send_files(self, files: List[Path], message: str, retry: bool = True) -> None:
-        """Send files with a message to the specified chat"""
-        if not files:
-            logging.warning("No files to send")
-            return
-            
         if self.config.dry_run:
-            file_names = [f.name for f in files]
-            logging.info(f"DRY RUN: Would send {len(files)} files to chat ID {self.config.chat_id}")
-            logging.info(f"Files: {', '.join(file_names[:5])}" + ("..." if len(file_names) > 5 else ""))
+            # Count and sample without holding the whole match set in memory
+            total_files = 0
+            first_names = []
+            for file in file_iter:
+                total_files += 1
+                if len(first_names) < 5:
+                    first_names.append(os.path.basename(file))
+            if not total_files:
+                logging.warning("No files to send")
+                return
+            logging.info(f"DRY RUN: Would send {total_files} files to chat ID {self.config.chat_id}")
+            logging.info(f"Files: {', '.join(first_names)}" + ("..." if total_files > 5 else ""))
             return
-            
-        file_groups = [files[i:i + self.config.max_files_per_group] 
-                      for i in range(0, len(files), self.config.max_files_per_group)]
-        
-        total_groups = len(file_groups)
-        logging.info(f"Sending {len(files)} files in {total_groups} groups")
-        
-        for group_idx, file_group in enumerate(file_groups, 1):
-            group_message = f"{message}\n\n(Group {group_idx}/{total_groups})"
-            attempts = self.config.retry_attempts if retry else 1
-            
-            for attempt in range(1, attempts + 1):
-                try:
-                    kwargs = {
-                        'entity': self.config.chat_id,
-                        'file': [str(f) for f in file_group],
-                        'parse_mode': 'HTML',
-                        'caption': group_message
-                    }
-                    if self.config.topic_id:
-                        kwargs['reply_to'] = self.config.topic_id
-                    
-                    await self.client.send_file(**kwargs)
-                    logging.info(f"File group {group_idx}/{total_groups} sent successfully")
-                    # Add a small delay between groups to avoid rate limiting
-                    if group_idx < total_groups:
-                        await asyncio.sleep(1)
-                    break
-                except Exception as e:
-                    if attempt < attempts:
-                        logging.warning(f"Attempt {attempt} for group {group_idx} failed: {str(e)}. Retrying in {self.config.retry_delay} seconds...")
-                        await asyncio.sleep(self.config.retry_delay)
+
+        # Dispatch groups concurrently; the semaphore keeps the number of
+        # in-flight uploads small enough to stay under Telegram's rate limits
+        semaphore = asyncio.Semaphore(self.config.max_concurrent_uploads)
+
+        async def send_one(group_idx: int, file_group: List[str]) -> None:
+            async with semaphore:
+                await self._send_group_with_retry(group_idx, file_group, message, retry)
+
+        tasks = []
+        total_files = 0
+        for file_group in self._iter_file_groups(file_iter):
+            total_files += len(file_group)
+            tasks.append(asyncio.create_task(send_one(len(tasks) + 1, file_group)))
+            # Yield so already-dispatched uploads progress while we keep chunking
+            await asyncio.sleep(0)
+
+        if not tasks:
+            logging.warning("No files to send")
+            return
+
+        logging.info(f"Sending {total_files} files in {len(tasks)} groups")
+        # Let every group settle before raising so a failed group doesn't
+        # leave sibling uploads running against a disconnecting client
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+    def _iter_file_groups(self, file_iter: Iterable[str]) -> Iterable[List[str]]:
+        """Chunk paths into upload groups, partitioned by file size
+
+        Small files share groups of up to max_files_per_group; anything at
+        or above _LARGE_FILE_THRESHOLD uploads alone, so one slow firmware
+        image never stalls a batch of small artifacts behind it.
+        """
+        small_files: List[str] = []
+        for file in file_iter:
+            try:
+                large = os.stat(file).st_size >= _LARGE_FILE_THRESHOLD
+            except OSError:
+                # Let send_file surface the real error for vanished files
+                large = False
+            if large:
+                yield [file]
+            else:
+                small_files.append(file)
+                if len(small_files) >= self.config.max_files_per_group:
+                    yield small_files
+                    small_files = []
+        if small_files:
+            yield small_files
+
+    async def _send_group_with_retry(self, group_idx: int, file_group: List[str],
+                                     message: str, retry: bool = True) -> None:
+        """Send a single file group, retrying on failure"""
+        attempts = self.config.retry_attempts if retry else 1
+
+        # The caption and kwargs are identical on every attempt; build
+        # them once instead of per retry
+        kwargs = {
+            'entity': self.config.chat_id,
+            'file': file_group,
+            'parse_mode': 'HTML',
+            'caption': f"{message}\n\n(Group {group_idx})"
+        }
+        if self.config.topic_id:
+            kwargs['reply_to'] = self.config.topic_id
+
+        for attempt in range(1, attempts + 1):
+            try:
+                await self.client.send_file(**kwargs)
+                logging.info(f"File group {group_idx} sent successfully")
+                return
+            except self._unrecoverable_errors as e:
+                logging.error(f"Unrecoverable error sending group {group_idx}: {str(e)}")
+                raise
+            except self._recoverable_errors as e:
+                if attempt < attempts:
+                    logging.warning(f"Attempt {attempt} for group {group_idx} failed: {str(e)}. Retrying...")
+                    if isinstance(e, self._flood_wait_error):
+                        # Telegram tells us exactly how long to wait
+                        await asyncio.sleep(e.seconds + random.random())
                     else:
-                        logging.error(f"Failed to send file group {group_idx} after {attempts} attempts: {str(e)}")
-                        raise
+                        await self._sleep_backoff(attempt)
+                else:
+                    logging.error(f"Failed to send file group {group_idx} after {attempts} attempts: {str(e)}")
+                    raise
+            except Exception as e:
+                logging.error(f"Unexpected error sending group {group_idx}: {str(e)}")
+                raise
+
+
+# Listener thread that drains the log queue; stopped via shutdown_logging
+_log_listener: Optional[QueueListener] = None
 
 
 def setup_logging(verbose: bool = False) -> None:
     """Configure logging with colored output"""
+    global _log_listener
     log_level = logging.DEBUG if verbose else logging.INFO
-    
+
     # Configure root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(log_level)
-    
+
     # Clear existing handlers
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
-    
-    # Console handler with colors
+    if _log_listener is not None:
+        _log_listener.stop()
+
+    # Console handler, colored only when attached to a terminal
     console_handler = logging.StreamHandler()
-    console_handler.setFormatter(ColoredFormatter('%(asctime)s - %(levelname)s - %(message)s'))
-    root_logger.addHandler(console_handler)
-    
-    # File handler
-    file_handler = logging.FileHandler('bot.log')
+    console_formatter = (ColoredFormatter if sys.stderr.isatty() else logging.Formatter)
+    console_handler.setFormatter(console_formatter('%(asctime)s - %(levelname)s - %(message)s'))
+
+    # Size-capped file handler
+    file_handler = RotatingFileHandler('bot.log', maxBytes=5_000_000, backupCount=3)
     file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-    root_logger.addHandler(file_handler)
+
+    # The async hot path only enqueues records; the listener thread does
+    # the formatting and console/disk writes
+    log_queue = queue.SimpleQueue()
+    root_logger.addHandler(QueueHandler(log_queue))
+    _log_listener = QueueListener(log_queue, console_handler, file_handler,
+                                  respect_handler_level=True)
+    _log_listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued log records and stop the listener thread"""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+
+@functools.lru_cache(maxsize=32)
+def _load_config_cached(config_path: str, mtime: float, size: int) -> Dict[str, Any]:
+    """Parse the JSON config, cached on (path, mtime, size) so repeated
+    loads of an unchanged file skip the re-parse"""
+    return _json_loads(Path(config_path).read_bytes())
 
 
 def load_config_file(config_path: str) -> Dict[str, Any]:
     """Load configuration from a JSON file"""
     try:
-        with open(config_path, 'r') as f:
-            return json.load(f)
+        stat = os.stat(config_path)
+        # Copy so callers (e.g. the CLI-override merge) can't mutate the
+        # cached dict in place
+        return dict(_load_config_cached(config_path, stat.st_mtime, stat.st_size))
     except Exception as e:
         logging.error(f"Failed to load config file: {str(e)}")
         sys.exit(1)
@@ -245,13 +441,40 @@ def load_config_file(config_path: str) -> Dict[str, Any]:
 def save_config_file(config: BotConfig, config_path: str) -> None:
     """Save configuration to a JSON file"""
     try:
-        with open(config_path, 'w') as f:
-            json.dump(config.to_dict(), f, indent=2)
+        payload = _json_dumps(config.to_dict())
+        path = Path(config_path)
+        existing = path.read_bytes() if path.exists() else b''
+        # Skip the rewrite when the serialized config matches what's on disk
+        if (hashlib.blake2b(payload, digest_size=16).digest()
+                == hashlib.blake2b(existing, digest_size=16).digest()):
+            logging.info(f"Configuration unchanged, not rewriting {config_path}")
+            return
+        path.write_bytes(payload)
         logging.info(f"Configuration saved to {config_path}")
     except Exception as e:
         logging.error(f"Failed to save config file: {str(e)}")
 
 
+def _iter_matching_files(pattern: str) -> Iterable[str]:
+    """Yield paths (as strings) of regular files matching the glob pattern
+
+    Flat patterns (no directory parts) are served straight from os.scandir,
+    which filters on the cached dirent type info instead of paying an extra
+    stat per entry; anything else falls back to Path.glob with an is_file()
+    filter. Either way directories never reach the upload path, where they
+    would only fail after burning a retry cycle.
+    """
+    if os.sep not in pattern and '/' not in pattern:
+        with os.scandir('.') as entries:
+            for entry in entries:
+                if fnmatch.fnmatch(entry.name, pattern) and entry.is_file():
+                    yield entry.name
+    else:
+        for path in Path().glob(pattern):
+            if path.is_file():
+                yield str(path)
+
+
 def parse_arguments() -> BotConfig:
     """Parse command line arguments"""
     parser = argparse.ArgumentParser(description="Telegram Bot for sending messages and files")
@@ -269,10 +492,12 @@ def parse_arguments() -> BotConfig:
     
     # Optional args
     parser.add_argument('--topic-id', type=int, help='Topic ID for forum channels')
+    parser.add_argument('--session-name', help='Name of the Telethon session file to reuse')
     parser.add_argument('--files', help='Path or glob pattern for files to send')
     parser.add_argument('--max-files', type=int, default=10, help='Maximum files per message group')
     parser.add_argument('--retry', type=int, default=3, help='Number of retry attempts')
-    parser.add_argument('--retry-delay', type=int, default=5, help='Seconds to wait between retries')
+    parser.add_argument('--retry-delay', type=float, default=None, dest='retry_base_delay',
+                        help='Base delay in seconds for exponential backoff between retries')
     parser.add_argument('--dry-run', action='store_true', help='Run without sending actual messages')
     parser.add_argument('--verbose', '-v', action='store_true', help='Enable verbose logging')
     
@@ -311,16 +536,9 @@ def parse_arguments() -> BotConfig:
         config_data = load_config_file(args.config)
     
     # Override with command line arguments
-    for key, value in vars(args).items():
-        if key in ['legacy_args', 'config', 'save_config', 'verbose']:
-            continue
-        if value is not None:
-            if key == 'files':
-                config_data['files_path'] = value
-            elif key == 'max_files':
-                config_data['max_files_per_group'] = value
-            else:
-                config_data[key] = value
+    config_data.update({_ARG_RENAME.get(key, key): value
+                        for key, value in vars(args).items()
+                        if key not in _ARG_SKIP and value is not None})
     
     # Validate required fields
     required_fields = ['api_id', 'api_hash', 'bot_token', 'chat_id', 'message']
@@ -354,9 +572,10 @@ async def main():
         start_time = time.time()
         
         if config.files_path:
-            files = list(Path().glob(config.files_path))
-            if files:
-                await bot.send_files(files, config.message)
+            file_iter = _iter_matching_files(config.files_path)
+            first_file = next(file_iter, None)
+            if first_file is not None:
+                await bot.send_files(itertools.chain([first_file], file_iter), config.message)
             else:
                 logging.warning(f"No files found matching pattern: {config.files_path}")
                 await bot.send_message(config.message)
@@ -375,11 +594,11 @@ async def main():
     finally:
         if 'bot' in locals():
             await bot.stop()
+        shutdown_logging()
     
     return 0
 
 
 if __name__ == '__main__':
-    from dataclasses import fields
     exit_code = asyncio.run(main())
     sys.exit(exit_code)
\ No newline at end of file